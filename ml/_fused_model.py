@@ -0,0 +1,94 @@
+"""
+Fused TF-IDF + linear classifier for the FCS scoring scripts
+Scores a text with one weight lookup per hashed token
+
+The training pipeline runs HashingVectorizer -> TfidfTransformer ->
+SGDClassifier, which builds and rescales a sparse matrix three times.
+Here coef * idf is folded into a single dense weight vector, so a text
+scores as sigmoid(sum(tf * w) / ||tf * idf|| + b).
+
+The per-token loop runs in the Numba kernels from _score_kernel.
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+from _model_store import load_arrays
+from _score_kernel import batch_score_kernel
+from _word_tokenizer import tokenize
+
+INT32_MIN = -2147483648
+
+
+class FusedLinearModel:
+    """Predict-only stand-in for a fitted hashing pipeline."""
+
+    def __init__(self, saved: dict):
+        vectorizer_params = dict(saved['params']['vectorizer'])
+        vectorizer_params['ngram_range'] = tuple(vectorizer_params['ngram_range'])
+        tfidf_params = saved['params']['tfidf']
+
+        if vectorizer_params['norm'] is not None or tfidf_params['norm'] not in ('l2', None):
+            raise ValueError("Fused scoring requires raw hashed counts and an l2 (or no) TF-IDF norm")
+
+        self.analyzer = HashingVectorizer(
+            tokenizer=tokenize, token_pattern=None, **vectorizer_params
+        ).build_analyzer()
+        self.n_features = vectorizer_params['n_features']
+        self.alternate_sign = vectorizer_params['alternate_sign']
+        self.sublinear_tf = tfidf_params['sublinear_tf']
+        self.l2_norm = tfidf_params['norm'] == 'l2'
+
+        idf = np.asarray(saved['idf'], dtype=np.float64)
+        self.weights = (np.asarray(saved['coef'][0], dtype=np.float64) * idf).astype(np.float32)
+        self.idf_sq = (idf * idf).astype(np.float32)
+        self.bias = float(saved['intercept'][0])
+        self.classes_ = np.asarray(saved['classes'])
+
+    def hash_tokens(self, text: str):
+        """Map a text's n-grams to (feature index, term count) arrays."""
+        counts = {}
+        for token in self.analyzer(text):
+            h = murmurhash3_32(token, seed=0)
+            # Same index and sign rule as sklearn's FeatureHasher
+            if h == INT32_MIN:
+                index = (2147483647 - (self.n_features - 1)) % self.n_features
+            else:
+                index = abs(h) % self.n_features
+            value = -1.0 if self.alternate_sign and h < 0 else 1.0
+            counts[index] = counts.get(index, 0.0) + value
+
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return indices, tf
+
+    def decision_function(self, texts) -> np.ndarray:
+        if len(texts) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        # Pack every text's hashed tokens into flat arrays for one kernel call
+        hashed = [self.hash_tokens(text) for text in texts]
+        offsets = np.zeros(len(hashed) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([indices.size for indices, _ in hashed])
+        indices = np.concatenate([indices for indices, _ in hashed])
+        tf = np.concatenate([tf for _, tf in hashed])
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+
+        return batch_score_kernel(
+            offsets, indices, tf, self.weights, self.idf_sq, self.bias, self.l2_norm
+        )
+
+    def predict_proba(self, texts) -> np.ndarray:
+        """Return (n_texts, 2) class probabilities, like the sklearn pipeline."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(texts)))
+        return np.column_stack([1.0 - positive, positive])
+
+
+def load_fused_model(model_dir: str) -> FusedLinearModel:
+    """Load a saved model directory and fuse it for scoring."""
+    model = FusedLinearModel(load_arrays(model_dir))
+    # Compile (or load the cached) kernel before the first request arrives
+    model.predict_proba(["warm up"])
+    return model
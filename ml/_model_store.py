@@ -0,0 +1,94 @@
+"""
+Array-based model storage for the FCS classifiers
+Persists fitted pipelines as raw .npy arrays that load without pickle
+
+A saved model is a directory holding:
+    params.json         - vectorizer and TF-IDF settings, default idf
+    idf_features.npy    - hashed features seen in training
+    idf.npy             - TF-IDF inverse document frequencies for those
+    coef_features.npy   - hashed features with a nonzero coefficient
+    coef.npy            - classifier coefficients for those
+    intercept.npy       - classifier intercept, shape (1,)
+    classes.npy         - classifier class labels
+
+Only a few thousand of the 2**18 hashed features ever occur, so idf and
+coef are stored compactly and expanded to dense vectors on load. The
+compact tables are small enough to read outright rather than memory-map.
+"""
+
+import json
+import os
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from _prediction_store import STORE_FILENAME
+
+VECTORIZER_PARAMS = ('n_features', 'ngram_range', 'stop_words', 'alternate_sign', 'norm')
+TFIDF_PARAMS = ('norm', 'sublinear_tf')
+
+
+def save_model_arrays(pipeline: Pipeline, model_dir: str):
+    """Write a fitted hashing pipeline as plain arrays (no pickle)."""
+    os.makedirs(model_dir, exist_ok=True)
+    vectorizer = pipeline.named_steps['hv']
+    tfidf = pipeline.named_steps['tfidf']
+    classifier = pipeline.named_steps['classifier']
+
+    # Features never seen in training all share the largest (smoothed) idf
+    idf = np.asarray(tfidf.idf_)
+    default_idf = float(idf.max())
+    idf_features = np.flatnonzero(idf != default_idf)
+    coef = np.asarray(classifier.coef_[0])
+    coef_features = np.flatnonzero(coef)
+
+    params = {
+        'vectorizer': {k: vectorizer.get_params()[k] for k in VECTORIZER_PARAMS},
+        'tfidf': {k: tfidf.get_params()[k] for k in TFIDF_PARAMS},
+        'default_idf': default_idf
+    }
+    with open(os.path.join(model_dir, 'params.json'), 'w') as f:
+        json.dump(params, f, indent=2)
+
+    arrays = {
+        'idf_features': idf_features,
+        'idf': idf[idf_features],
+        'coef_features': coef_features,
+        'coef': coef[coef_features],
+        'intercept': classifier.intercept_,
+        'classes': classifier.classes_
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(model_dir, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+
+    # Precomputed predictions belong to the previous weights
+    store_path = os.path.join(model_dir, STORE_FILENAME)
+    if os.path.exists(store_path):
+        os.remove(store_path)
+
+
+def load_arrays(model_dir: str) -> dict:
+    """Read the saved arrays and rebuild dense idf and coef vectors."""
+    with open(os.path.join(model_dir, 'params.json'), 'r') as f:
+        params = json.load(f)
+
+    arrays = {
+        name: np.load(os.path.join(model_dir, f'{name}.npy'), allow_pickle=False)
+        for name in ('idf_features', 'idf', 'coef_features', 'coef', 'intercept', 'classes')
+    }
+
+    # Expand the compact tables to dense per-feature vectors
+    n_features = params['vectorizer']['n_features']
+    idf = np.full(n_features, params['default_idf'], dtype=np.float64)
+    idf[arrays['idf_features']] = arrays['idf']
+    coef = np.zeros((1, n_features), dtype=np.float64)
+    coef[0, arrays['coef_features']] = arrays['coef']
+
+    return {
+        'params': params,
+        'idf': idf,
+        'coef': coef,
+        'intercept': arrays['intercept'],
+        'classes': arrays['classes']
+    }
+
@@ -0,0 +1,110 @@
+"""
+Precomputed prediction store for the FCS scoring scripts
+Read-only SQLite lookup of class probabilities keyed on the text's SHA-1
+
+Stores are written by precompute_cache.py into each model directory and
+record a digest of the model files they were computed with. A store whose
+digest does not match the model being served is ignored.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+STORE_FILENAME = 'prediction_cache.sqlite'
+
+# Let SQLite serve reads straight from the page cache
+MMAP_SIZE = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    h BLOB PRIMARY KEY,
+    p0 REAL NOT NULL,
+    p1 REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def text_key(text: str) -> bytes:
+    """SHA-1 digest used as the lookup key for a text."""
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+def model_digest(model_dir: str) -> str:
+    """SHA-256 over a model directory's files, excluding the store itself."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if name.startswith(STORE_FILENAME) or not os.path.isfile(path):
+            continue
+        digest.update(name.encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class PredictionStore:
+    """Read-only, thread-safe view of a precomputed prediction table."""
+
+    def __init__(self, path: str):
+        self.uri = Path(path).absolute().as_uri() + '?mode=ro'
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections are per thread; each request thread opens
+        # its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.uri, uri=True)
+            conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            self._local.conn = conn
+        return conn
+
+    def get(self, text: str):
+        """Return stored [p0, p1] for a text, or None on a miss."""
+        row = self._connection().execute(
+            'SELECT p0, p1 FROM predictions WHERE h = ?', (text_key(text),)
+        ).fetchone()
+        return np.array(row) if row else None
+
+    def model_digest(self):
+        """Digest of the model files the store was computed with, if recorded."""
+        row = self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'model_digest'"
+        ).fetchone()
+        return row[0] if row else None
+
+
+def with_prediction_store(predict_fn, model_dir: str):
+    """
+    Wrap a single-text predict function with a precomputed-store lookup.
+
+    Returns predict_fn unchanged when the model directory has no store, or
+    the store was computed with different model files.
+    """
+    path = os.path.join(model_dir, STORE_FILENAME)
+    if not os.path.exists(path):
+        return predict_fn
+
+    store = PredictionStore(path)
+    try:
+        stored_digest = store.model_digest()
+    except sqlite3.OperationalError:  # Store written before digests were recorded
+        stored_digest = None
+    if stored_digest != model_digest(model_dir):
+        print(f"WARNING: Ignoring stale prediction store: {path}")
+        return predict_fn
+
+    def predict(text: str):
+        proba = store.get(text)
+        return proba if proba is not None else predict_fn(text)
+
+    return predict
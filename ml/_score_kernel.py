@@ -0,0 +1,48 @@
+"""
+Compiled inner loop for fused FCS scoring
+Accumulates hashed-token weights for a batch of texts with Numba
+
+Without Numba installed the same functions run as plain Python loops,
+which is slower but gives identical scores.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def score_kernel(indices, tf, weights, idf_sq, bias, l2_norm):
+    """Decision value for one text's (feature index, term frequency) arrays."""
+    s = 0.0
+    n = 0.0
+    for i in range(indices.size):
+        idx = indices[i]
+        s += tf[i] * weights[idx]
+        n += tf[i] * tf[i] * idf_sq[idx]
+
+    if l2_norm:
+        s = s / math.sqrt(n) if n > 0.0 else 0.0
+    return s + bias
+
+
+# Serial on purpose: the kernel is entered concurrently from request
+# threads, and Numba's default workqueue layer is not thread-safe
+@njit(cache=True, fastmath=True, nogil=True)
+def batch_score_kernel(offsets, indices, tf, weights, idf_sq, bias, l2_norm):
+    """Decision values for texts packed as CSR-style offsets into flat arrays."""
+    n_rows = offsets.size - 1
+    out = np.empty(n_rows, dtype=np.float64)
+    for row in range(n_rows):
+        start = offsets[row]
+        end = offsets[row + 1]
+        out[row] = score_kernel(
+            indices[start:end], tf[start:end], weights, idf_sq, bias, l2_norm
+        )
+    return out
@@ -0,0 +1,67 @@
+"""
+Request and response encoding for the FCS scoring scripts
+JSON by default, msgpack when the client asks for application/msgpack
+"""
+
+from dataclasses import fields, is_dataclass
+
+import msgpack
+import orjson
+from azureml.contrib.services.aml_response import AMLResponse
+
+MSGPACK_TYPE = 'application/msgpack'
+
+
+def dumps(obj) -> str:
+    """Serialize a response payload, accepting numpy values and dataclasses."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _pack_default(obj):
+    """Pack result dataclasses as maps; orjson handles them natively."""
+    if is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def with_proba(result, proba) -> dict:
+    """A result as a map plus its unrounded class probabilities."""
+    payload = {f.name: getattr(result, f.name) for f in fields(result)}
+    payload['proba'] = proba.tolist()
+    return payload
+
+
+def sends_msgpack(request) -> bool:
+    """True if the request body is msgpack-encoded."""
+    return request.headers.get('Content-Type', '').startswith(MSGPACK_TYPE)
+
+
+def wants_msgpack(request) -> bool:
+    """True if the client asked for a msgpack response."""
+    return MSGPACK_TYPE in request.headers.get('Accept', '') or sends_msgpack(request)
+
+
+def read_body(request) -> dict:
+    """Decode the request body as msgpack or JSON based on its content type."""
+    body = request.get_data()
+    if sends_msgpack(request):
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except ValueError as e:
+            # Some msgpack decode errors carry no message of their own
+            raise ValueError(f"Malformed msgpack body: {str(e) or type(e).__name__}") from e
+    return orjson.loads(body)
+
+
+def respond(request, payload):
+    """
+    Encode a response payload for the client.
+
+    msgpack responses carry packed floats directly, including the raw
+    "proba" that score_payload adds for them. JSON responses are returned
+    as a string, exactly as the scoring scripts always have.
+    """
+    if wants_msgpack(request):
+        body = msgpack.packb(payload, default=_pack_default, use_bin_type=True)
+        return AMLResponse(body, 200, {'Content-Type': MSGPACK_TYPE})
+    return dumps(payload)
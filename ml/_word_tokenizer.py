@@ -0,0 +1,19 @@
+"""
+Shared word tokenizer for the FCS TF-IDF classifiers
+Splits text with sklearn's default token pattern
+
+Training and scoring both tokenize through this module, so hashed
+features line up between the saved weights and live requests.
+"""
+
+import re
+
+# sklearn's default TfidfVectorizer token pattern
+TOKEN_PATTERN = r'\b\w\w+\b'
+
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+
+def tokenize(text: str) -> list:
+    """Split preprocessed text into word tokens of two or more characters."""
+    return _TOKEN_RE.findall(text)
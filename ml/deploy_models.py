@@ -4,15 +4,31 @@ Deploys all three FCS classifiers using serverless compute (works with Azure for
 
 Usage:
     python deploy_models.py --subscription-id <sub> --resource-group <rg> --workspace-name <ws>
+
+Re-running is cheap: every artifact is tagged with the SHA-256 of its local
+files, and an existing version with the same hash is reused instead of
+being uploaded again.
 """
 
 import os
 import argparse
+import asyncio
+import hashlib
 import json
+import shutil
+import tempfile
 from azure.ai.ml import MLClient
+from azure.core.exceptions import ResourceNotFoundError
 from azure.ai.ml.entities import Model, Environment
 from azure.identity import InteractiveBrowserCredential
 
+ENV_IMAGE = "mcr.microsoft.com/azureml/openmpi4.1.0-ubuntu20.04:latest"
+
+# Combined model holding all three model directories, for score_all.py
+# (BUNDLE_DIR must match score_all.BUNDLE_DIR)
+BUNDLE_NAME = "fcs-classifiers"
+BUNDLE_DIR = "fcs_classifiers"
+
 
 def get_ml_client(subscription_id: str, resource_group: str, workspace_name: str):
     """Initialize Azure ML client using browser-based authentication."""
@@ -27,14 +43,52 @@ def get_ml_client(subscription_id: str, resource_group: str, workspace_name: str
     )
 
 
+def path_sha256(path: str) -> str:
+    """Hash a file, or every file under a directory in sorted order."""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    else:
+        files = [path]
+    
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def find_version_by_hash(list_versions, name: str, digest: str):
+    """Return the registered version tagged with this hash, if any."""
+    try:
+        for version in list_versions(name=name):
+            if (version.tags or {}).get('sha256') == digest:
+                return version
+    except ResourceNotFoundError:
+        pass
+    return None
+
+
 def register_model(ml_client: MLClient, model_name: str, model_path: str):
-    """Register a model in Azure ML."""
+    """Register a model in Azure ML, reusing an identical existing version."""
+    digest = path_sha256(model_path)
+    existing = find_version_by_hash(ml_client.models.list, model_name, digest)
+    if existing is not None:
+        print(f"  Model unchanged: {existing.name} (version {existing.version})")
+        return existing
+    
     print(f"Registering model: {model_name}")
     
     model = Model(
         name=model_name,
         path=model_path,
-        description=f"FCS {model_name} classifier for Future Context Snapshot system"
+        description=f"FCS {model_name} classifier for Future Context Snapshot system",
+        tags={"sha256": digest}
     )
     
     registered_model = ml_client.models.create_or_update(model)
@@ -42,15 +96,34 @@ def register_model(ml_client: MLClient, model_name: str, model_path: str):
     return registered_model
 
 
+def stage_bundle(model_dirs: dict, staging_dir: str) -> str:
+    """Copy the model directories into one folder to register as a single model."""
+    bundle_path = os.path.join(staging_dir, BUNDLE_DIR)
+    for model_dir, model_path in model_dirs.items():
+        shutil.copytree(model_path, os.path.join(bundle_path, model_dir))
+    return bundle_path
+
+
 def create_environment(ml_client: MLClient, env_name: str):
-    """Create a conda environment for scoring."""
+    """Create a conda environment for scoring, reusing an identical existing version."""
+    digest = hashlib.sha256(ENV_IMAGE.encode('utf-8'))
+    with open("conda.yaml", 'rb') as f:
+        digest.update(f.read())
+    digest = digest.hexdigest()
+    
+    existing = find_version_by_hash(ml_client.environments.list, env_name, digest)
+    if existing is not None:
+        print(f"  Environment unchanged: {existing.name} (version {existing.version})")
+        return existing
+    
     print(f"Creating environment: {env_name}")
     
     env = Environment(
         name=env_name,
         conda_file="conda.yaml",
-        image="mcr.microsoft.com/azureml/openmpi4.1.0-ubuntu20.04:latest",
-        description="Environment for FCS classifiers"
+        image=ENV_IMAGE,
+        description="Environment for FCS classifiers",
+        tags={"sha256": digest}
     )
     
     registered_env = ml_client.environments.create_or_update(env)
@@ -58,6 +131,19 @@ def create_environment(ml_client: MLClient, env_name: str):
     return registered_env
 
 
+async def register_all(ml_client: MLClient, env_name: str, model_paths: dict):
+    """Create the environment and register every model concurrently."""
+    # The azure-ai-ml client is synchronous, so each call runs in a worker thread
+    results = await asyncio.gather(
+        asyncio.to_thread(create_environment, ml_client, env_name),
+        *(
+            asyncio.to_thread(register_model, ml_client, model_name, model_path)
+            for model_name, model_path in model_paths.items()
+        )
+    )
+    return results[0], dict(zip(model_paths, results[1:]))
+
+
 def main():
     parser = argparse.ArgumentParser(description='Deploy FCS ML Models to Azure')
     parser.add_argument('--subscription-id', type=str, required=True)
@@ -76,36 +162,49 @@ def main():
     print(f"Connected to workspace: {args.workspace_name}")
     print()
     
-    # Create shared environment
-    print("=== Creating Scoring Environment ===")
-    env = create_environment(ml_client, "fcs-classifier-env")
-    print()
-    
-    # Register all models
+    # Register all models (array directories written by save_model_arrays)
     models_info = [
-        ("decision-gravity-classifier", "decision_gravity_model.joblib"),
-        ("question-depth-classifier", "question_depth_model.joblib"),
-        ("consequence-depth-classifier", "consequence_depth_model.joblib")
+        ("decision-gravity-classifier", "decision_gravity_model"),
+        ("question-depth-classifier", "question_depth_model"),
+        ("consequence-depth-classifier", "consequence_depth_model")
     ]
     
-    registered_models = {}
+    model_paths = {}
+    model_dirs = {}
     
-    for model_name, model_file in models_info:
-        print(f"=== Registering {model_name} ===")
-        model_path = os.path.join(args.models_dir, model_file)
+    for model_name, model_dir in models_info:
+        model_path = os.path.join(args.models_dir, model_dir)
         
         if not os.path.exists(model_path):
-            print(f"  WARNING: Model file not found: {model_path}")
+            print(f"  WARNING: Model directory not found: {model_path}")
             print(f"  Skipping {model_name}")
             continue
-            
-        model = register_model(ml_client, model_name, model_path)
-        registered_models[model_name] = {
+        
+        model_paths[model_name] = model_path
+        model_dirs[model_dir] = model_path
+    
+    with tempfile.TemporaryDirectory() as staging_dir:
+        # An online deployment mounts a single model, so score_all.py gets
+        # all three directories through one combined registration
+        if len(model_dirs) == len(models_info):
+            model_paths[BUNDLE_NAME] = stage_bundle(model_dirs, staging_dir)
+        else:
+            print(f"  WARNING: Not all models found; skipping {BUNDLE_NAME}")
+        
+        # Create shared environment and register models in one concurrent batch
+        print("=== Registering Scoring Environment and Models ===")
+        env, models = asyncio.run(register_all(ml_client, "fcs-classifier-env", model_paths))
+        print()
+    
+    registered_models = {
+        model_name: {
             "name": model.name,
             "version": model.version,
             "id": model.id
         }
-        print()
+        for model_name, model in models.items()
+    }
+    bundle = registered_models.pop(BUNDLE_NAME, None)
     
     # Save model info for later use
     config_path = os.path.join(args.models_dir, "azure_models_config.json")
@@ -117,7 +216,12 @@ def main():
             "name": env.name,
             "version": env.version
         },
-        "models": registered_models
+        "models": registered_models,
+        # The one model a score_all.py deployment mounts
+        "score_all": {
+            "scoring_script": "score_all.py",
+            "model": bundle
+        }
     }
     
     with open(config_path, 'w') as f:
@@ -129,9 +233,14 @@ def main():
     print(f"Models registered: {len(registered_models)}")
     for name, info in registered_models.items():
         print(f"  - {name} (v{info['version']})")
+    if bundle is not None:
+        print(f"  - {BUNDLE_NAME} (v{bundle['version']}, all three for score_all.py)")
     print()
     print(f"Configuration saved to: {config_path}")
     print()
+    print("Serve all three models from one deployment of score_all.py that mounts")
+    print(f"{BUNDLE_NAME}; it dispatches on the request's \"classifier\" field.")
+    print()
     print("NOTE: For MVP demo, models will be loaded locally or via batch inference.")
     print("      Managed endpoints require paid compute which isn't available on Azure for Students.")
     print()
@@ -0,0 +1,114 @@
+"""
+Prediction Cache Precomputation Script
+Offline batch scoring for the FCS classifiers
+
+Scores a corpus of common inputs with each trained model and writes the
+class probabilities into that model's directory as a SQLite store. The
+scoring endpoints consult the store before running live inference.
+
+Usage:
+    python precompute_cache.py --models-dir outputs --corpus data/*.jsonl
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+
+from _fused_model import load_fused_model
+from _prediction_store import SCHEMA, STORE_FILENAME, model_digest, text_key
+
+BATCH_SIZE = 4096
+
+MODEL_DIRS = [
+    "decision_gravity_model",
+    "question_depth_model",
+    "consequence_depth_model"
+]
+
+
+def iter_corpus_texts(paths):
+    """Stream unique texts from JSONL files with a "text" field."""
+    seen = set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                text = json.loads(line.strip()).get('text')
+                if not text:
+                    continue
+                key = text_key(text)
+                if key not in seen:
+                    seen.add(key)
+                    yield text
+
+
+def iter_batches(texts, batch_size: int = BATCH_SIZE):
+    """Group a text stream into lists of at most batch_size."""
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def precompute(model_dir: str, corpus_paths) -> int:
+    """Score the corpus with one model and write its prediction store."""
+    model = load_fused_model(model_dir)
+    store_path = os.path.join(model_dir, STORE_FILENAME)
+
+    # Rebuild from scratch so no entry outlives the corpus it came from
+    if os.path.exists(store_path):
+        os.remove(store_path)
+
+    conn = sqlite3.connect(store_path)
+    conn.executescript(SCHEMA)
+    # Lets the scoring scripts reject this store if the model changes
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('model_digest', ?)", (model_digest(model_dir),)
+    )
+    rows = 0
+
+    for batch in iter_batches(iter_corpus_texts(corpus_paths)):
+        probas = model.predict_proba(batch)
+        conn.executemany(
+            'INSERT OR REPLACE INTO predictions (h, p0, p1) VALUES (?, ?, ?)',
+            ((text_key(text), float(p[0]), float(p[1])) for text, p in zip(batch, probas))
+        )
+        rows += len(batch)
+
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute FCS prediction caches')
+    parser.add_argument('--models-dir', type=str,
+                        default='outputs',
+                        help='Directory containing the trained model directories')
+    parser.add_argument('--corpus', type=str, nargs='+',
+                        default=sorted(glob.glob('data/*.jsonl')),
+                        help='JSONL files of common inputs to precompute')
+    args = parser.parse_args()
+
+    print(f"Corpus files: {len(args.corpus)}")
+
+    for model_name in MODEL_DIRS:
+        model_dir = os.path.join(args.models_dir, model_name)
+
+        if not os.path.exists(model_dir):
+            print(f"  WARNING: Model directory not found: {model_dir}")
+            print(f"  Skipping {model_name}")
+            continue
+
+        rows = precompute(model_dir, args.corpus)
+        print(f"{model_name}: {rows} predictions cached in {os.path.join(model_dir, STORE_FILENAME)}")
+
+
+if __name__ == '__main__':
+    main()
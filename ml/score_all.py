@@ -0,0 +1,115 @@
+"""
+Scoring script for all three FCS classifiers
+Azure ML Online Endpoint
+
+One deployment serves every classifier from a single process. It mounts
+the combined model registered by deploy_models.py, whose three model
+directories sit side by side under AZUREML_MODEL_DIR/fcs_classifiers, and
+loads each once at startup.
+"""
+
+import os
+
+from azureml.contrib.services.aml_request import rawhttp
+
+from _wire import read_body, respond, wants_msgpack
+import score_consequence_depth
+import score_decision_gravity
+import score_question_depth
+
+# Folder of the combined model, as staged by deploy_models.py
+BUNDLE_DIR = "fcs_classifiers"
+
+# Classifier name -> scoring module, in FCS gate order
+CLASSIFIERS = {
+    "decision_gravity": score_decision_gravity,
+    "question_depth": score_question_depth,
+    "consequence_depth": score_consequence_depth
+}
+
+# Short names accepted in the request's "classifier" field
+CLASSIFIER_ALIASES = {
+    "gravity": "decision_gravity",
+    "question": "question_depth",
+    "consequence": "consequence_depth"
+}
+
+# Gate decision each classifier reports when it cannot score
+ERROR_GATE_DECISIONS = {
+    "decision_gravity": "REFUSE",
+    "question_depth": "REJECT",
+    "consequence_depth": "TERMINATE"
+}
+
+
+def init():
+    """Initialize all three models on endpoint startup."""
+    model_root = os.path.join(os.getenv('AZUREML_MODEL_DIR'), BUNDLE_DIR)
+    for module in CLASSIFIERS.values():
+        module.init(model_root)
+    print("All FCS models loaded successfully")
+
+
+def score_all(text: str, include_proba: bool = False) -> dict:
+    """Score a text with every classifier in turn and merge the results."""
+    # Each call is short and CPU-bound, so in-line calls beat a thread fan-out
+    return {
+        name: module.score_payload({"text": text}, include_proba)
+        for name, module in CLASSIFIERS.items()
+    }
+
+
+def error_result(message: str) -> dict:
+    """Report the same error under every classifier with its failing gate."""
+    return {
+        name: {"error": message, "gate_decision": gate_decision}
+        for name, gate_decision in ERROR_GATE_DECISIONS.items()
+    }
+
+
+@rawhttp
+def run(request):
+    """
+    Score one text with every FCS classifier in a single request, or with
+    just one of them when "classifier" is given.
+
+    Input JSON:
+    {
+        "text": "I'm considering leaving my career..."
+    }
+
+    Output JSON:
+    {
+        "decision_gravity": {"gravity_score": 0.85, ...},
+        "question_depth": {"depth_score": 0.42, ...},
+        "consequence_depth": {"consequence_depth_score": 0.61, ...}
+    }
+
+    Each entry has the same shape as that classifier's own endpoint.
+
+    Adding "classifier" (e.g. "decision_gravity" or "gravity") returns only
+    that classifier's response, exactly as its own endpoint would, and
+    also accepts batch input {"texts": [...]}.
+    Content-Type or Accept application/msgpack selects a msgpack response,
+    with each result's unrounded class probabilities added as "proba".
+    """
+    try:
+        data = read_body(request)
+        include_proba = wants_msgpack(request)
+        classifier = data.get('classifier')
+
+        if classifier is not None:
+            name = CLASSIFIER_ALIASES.get(classifier, classifier)
+            if name not in CLASSIFIERS:
+                return respond(request, error_result(f"Unknown classifier: {classifier}"))
+            return respond(request, CLASSIFIERS[name].score_payload(data, include_proba))
+
+        text = data.get('text', '')
+
+        if not text:
+            return respond(request, error_result("No text provided"))
+
+        return respond(request, score_all(text, include_proba))
+
+    except Exception as e:
+        return respond(request, error_result(str(e)))
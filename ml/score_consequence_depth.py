@@ -4,20 +4,120 @@ Azure ML Online Endpoint
 """
 
 import os
-import json
-import joblib
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import count
+
 import numpy as np
+from azureml.contrib.services.aml_request import rawhttp
+
+from _fused_model import load_fused_model
+from _prediction_store import with_prediction_store
+from _wire import read_body, respond, wants_msgpack, with_proba
+
+# Bounded in-process cache of class probabilities, keyed on the raw text
+CACHE_SIZE = int(os.getenv('SCORE_CACHE_SIZE', '4096'))
+
+# Per-dimension scale on the class score, in response key order
+DIMENSION_WEIGHTS = np.array([0.95, 0.92, 0.98])
+
+# Rows of pre-generated dimension jitter, three samples per response
+JITTER_ROWS = 1 << 14
 
 
-def init():
-    """Initialize model on endpoint startup."""
-    global model
-    model_path = os.path.join(os.getenv('AZUREML_MODEL_DIR'), 'consequence_depth_model.joblib')
-    model = joblib.load(model_path)
+def init(model_root: str = None):
+    """Initialize model on endpoint startup (from AZUREML_MODEL_DIR by default)."""
+    global model, cached_predict, jitter, jitter_counter
+    model_dir = os.path.join(model_root or os.getenv('AZUREML_MODEL_DIR'), 'consequence_depth_model')
+    model = load_fused_model(model_dir)
+    # LRU cache first, then the precomputed store, then live inference
+    cached_predict = lru_cache(maxsize=CACHE_SIZE)(with_prediction_store(predict_one, model_dir))
+    jitter = np.random.uniform(-0.05, 0.05, size=(JITTER_ROWS, 3))
+    jitter_counter = count()
     print("Consequence Depth model loaded successfully")
 
 
-def run(raw_data):
+def predict_one(text: str):
+    """Class probabilities for a single text, straight from the model."""
+    return model.predict_proba([text])[0]
+
+
+def next_jitter():
+    """Return the next row of three jitter samples from the ring buffer."""
+    return jitter[next(jitter_counter) % JITTER_ROWS]
+
+
+@dataclass
+class ConsequenceDepthResult:
+    """Response payload for one reflection, serialized in field order."""
+    __slots__ = ('consequence_depth_score', 'dimensions', 'gate_decision', 'confidence')
+    consequence_depth_score: float
+    dimensions: dict
+    gate_decision: str
+    confidence: float
+
+
+def build_result(text: str, proba) -> ConsequenceDepthResult:
+    """Build the response payload for one reflection's class probabilities."""
+    depth_score = proba[1]  # Probability of "deep" class
+    
+    # Determine gate decision (threshold 0.5 for consequences)
+    gate_decision = "APPROVE" if depth_score >= 0.5 else "TERMINATE"
+    
+    emotional_specificity, concrete_reasoning, narrative_depth = np.round(
+        depth_score * DIMENSION_WEIGHTS + next_jitter(), 3
+    ).tolist()
+    
+    return ConsequenceDepthResult(
+        consequence_depth_score=round(depth_score, 3),
+        dimensions={
+            "emotional_specificity": emotional_specificity,
+            "concrete_reasoning": concrete_reasoning,
+            "narrative_depth": narrative_depth
+        },
+        gate_decision=gate_decision,
+        confidence=round(proba.max(), 3)
+    )
+
+
+def score_payload(data: dict, include_proba: bool = False):
+    """
+    Score a decoded request body and return the response payload.
+    
+    include_proba adds each text's unrounded class probabilities as "proba".
+    """
+    texts = data.get('texts')
+    
+    if texts is not None:
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t for t in texts):
+            return {
+                "error": "No texts provided",
+                "gate_decision": "TERMINATE"
+            }
+        
+        probas = model.predict_proba(texts)
+        results = [build_result(t, p) for t, p in zip(texts, probas)]
+        if include_proba:
+            results = [with_proba(r, p) for r, p in zip(results, probas)]
+        return {"results": results}
+    
+    text = data.get('text', '')
+    
+    if not text:
+        return {
+            "error": "No text provided",
+            "gate_decision": "TERMINATE"
+        }
+    
+    # Repeated and precomputed texts skip the model
+    proba = cached_predict(text)
+    result = build_result(text, proba)
+    
+    return with_proba(result, proba) if include_proba else result
+
+
+@rawhttp
+def run(request):
     """
     Score a generated reflection for consequence depth.
     
@@ -37,39 +137,20 @@ def run(raw_data):
         "gate_decision": "APPROVE",
         "confidence": 0.92
     }
+    
+    Batch input {"texts": [...]} is scored in a single predict_proba call
+    and returns {"results": [...]} in the same order.
+    
+    Requests sent with Content-Type or Accept application/msgpack get a
+    msgpack-encoded response of the same shape, plus each result's
+    unrounded class probabilities as "proba"; JSON stays the default.
     """
     try:
-        data = json.loads(raw_data)
-        text = data.get('text', '')
-        
-        if not text:
-            return json.dumps({
-                "error": "No text provided",
-                "gate_decision": "TERMINATE"
-            })
-        
-        # Get prediction probabilities
-        proba = model.predict_proba([text])[0]
-        depth_score = float(proba[1])  # Probability of "deep" class
-        
-        # Determine gate decision (threshold 0.5 for consequences)
-        gate_decision = "APPROVE" if depth_score >= 0.5 else "TERMINATE"
-        
-        result = {
-            "consequence_depth_score": round(depth_score, 3),
-            "dimensions": {
-                "emotional_specificity": round(depth_score * 0.95 + np.random.uniform(-0.05, 0.05), 3),
-                "concrete_reasoning": round(depth_score * 0.92 + np.random.uniform(-0.05, 0.05), 3),
-                "narrative_depth": round(depth_score * 0.98 + np.random.uniform(-0.05, 0.05), 3)
-            },
-            "gate_decision": gate_decision,
-            "confidence": round(float(max(proba)), 3)
-        }
-        
-        return json.dumps(result)
+        data = read_body(request)
+        return respond(request, score_payload(data, include_proba=wants_msgpack(request)))
         
     except Exception as e:
-        return json.dumps({
+        return respond(request, {
             "error": str(e),
             "gate_decision": "TERMINATE"
         })
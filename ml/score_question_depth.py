@@ -4,9 +4,31 @@ Azure ML Online Endpoint
 """
 
 import os
-import json
-import joblib
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import count
+from typing import Optional
+
 import numpy as np
+from azureml.contrib.services.aml_request import rawhttp
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from _fused_model import load_fused_model
+from _prediction_store import with_prediction_store
+from _wire import read_body, respond, wants_msgpack, with_proba
+
+# Bounded in-process cache of class probabilities, keyed on the raw text
+CACHE_SIZE = int(os.getenv('SCORE_CACHE_SIZE', '4096'))
+
+# Per-dimension scale on the class score, in response key order
+DIMENSION_WEIGHTS = np.array([0.95, 0.98, 0.92])
+
+# Rows of pre-generated dimension jitter, three samples per response
+JITTER_ROWS = 1 << 14
 
 
 # Rejection guidance for shallow questions
@@ -19,34 +41,167 @@ REJECTION_GUIDANCE = {
     "comparison": "This system explores ONE future. Ask about this path specifically."
 }
 
+# Phrases that mark each shallow question type, in priority order
+REJECTION_PHRASES = [
+    ("advice_seeking", ['should i', 'what should', 'recommend', 'advise']),
+    ("predictive", ['will i', 'will it', 'what will', 'going to']),
+    ("leading", ["won't", "isn't it", "don't you think", "right?"]),
+    ("comparison", ['what if i had', 'other option', 'alternative'])
+]
+
 
-def init():
-    """Initialize model on endpoint startup."""
-    global model
-    model_path = os.path.join(os.getenv('AZUREML_MODEL_DIR'), 'question_depth_model.joblib')
-    model = joblib.load(model_path)
+def init(model_root: str = None):
+    """Initialize model on endpoint startup (from AZUREML_MODEL_DIR by default)."""
+    global model, cached_predict, jitter, jitter_counter
+    model_dir = os.path.join(model_root or os.getenv('AZUREML_MODEL_DIR'), 'question_depth_model')
+    model = load_fused_model(model_dir)
+    # LRU cache first, then the precomputed store, then live inference
+    cached_predict = lru_cache(maxsize=CACHE_SIZE)(with_prediction_store(predict_one, model_dir))
+    jitter = np.random.uniform(-0.05, 0.05, size=(JITTER_ROWS, 3))
+    jitter_counter = count()
     print("Question Depth model loaded successfully")
 
 
+def build_rejection_automaton():
+    """Compile all rejection phrases into one Aho-Corasick automaton."""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for priority, (rejection_type, phrases) in enumerate(REJECTION_PHRASES):
+        for phrase in phrases:
+            automaton.add_word(phrase, (priority, rejection_type))
+    automaton.make_automaton()
+    return automaton
+
+
+REJECTION_AUTOMATON = build_rejection_automaton()
+
+
+def match_rejection_phrase(text_lower: str):
+    """Return the highest-priority rejection type whose phrase occurs, if any."""
+    if REJECTION_AUTOMATON is None:
+        for rejection_type, phrases in REJECTION_PHRASES:
+            if any(p in text_lower for p in phrases):
+                return rejection_type
+        return None
+    
+    # Single pass over the text; keep the match from the earliest category
+    best = None
+    for _, (priority, rejection_type) in REJECTION_AUTOMATON.iter(text_lower):
+        if best is None or priority < best[0]:
+            best = (priority, rejection_type)
+            if priority == 0:
+                break
+    return best[1] if best else None
+
+
 def detect_rejection_type(text: str) -> str:
     """Detect the type of shallow question for guidance."""
-    text_lower = text.lower()
-    
-    if any(p in text_lower for p in ['should i', 'what should', 'recommend', 'advise']):
-        return "advice_seeking"
-    if any(p in text_lower for p in ['will i', 'will it', 'what will', 'going to']):
-        return "predictive"
-    if any(p in text_lower for p in ["won't", "isn't it", "don't you think", "right?"]):
-        return "leading"
-    if any(p in text_lower for p in ['what if i had', 'other option', 'alternative']):
-        return "comparison"
+    rejection_type = match_rejection_phrase(text.lower())
+    
+    if rejection_type:
+        return rejection_type
     if len(text.split()) < 6:
         return "binary"
     
     return "generic"
 
 
-def run(raw_data):
+def predict_one(text: str):
+    """Class probabilities for a single text, straight from the model."""
+    return model.predict_proba([text])[0]
+
+
+def next_jitter():
+    """Return the next row of three jitter samples from the ring buffer."""
+    return jitter[next(jitter_counter) % JITTER_ROWS]
+
+
+@dataclass
+class QuestionDepthResult:
+    """Response payload for one question, serialized in field order."""
+    __slots__ = ('depth_score', 'dimensions', 'gate_decision', 'rejection_type', 'guidance', 'confidence')
+    depth_score: float
+    dimensions: dict
+    gate_decision: str
+    rejection_type: Optional[str]
+    guidance: Optional[str]
+    confidence: float
+
+
+def build_result(text: str, proba) -> QuestionDepthResult:
+    """Build the response payload for one question's class probabilities."""
+    depth_score = proba[1]  # Probability of "deep" class
+    
+    # Determine gate decision (threshold 0.6 for questions)
+    gate_decision = "PROCEED" if depth_score >= 0.6 else "REJECT"
+    
+    # Get rejection info if rejected
+    rejection_type = None
+    guidance = None
+    if gate_decision == "REJECT":
+        rejection_type = detect_rejection_type(text)
+        guidance = REJECTION_GUIDANCE.get(rejection_type, REJECTION_GUIDANCE["generic"])
+    
+    specificity, introspective_depth, non_leading = np.round(
+        depth_score * DIMENSION_WEIGHTS + next_jitter(), 3
+    ).tolist()
+    
+    return QuestionDepthResult(
+        depth_score=round(depth_score, 3),
+        dimensions={
+            "specificity": specificity,
+            "introspective_depth": introspective_depth,
+            "non_leading": non_leading
+        },
+        gate_decision=gate_decision,
+        rejection_type=rejection_type,
+        guidance=guidance,
+        confidence=round(proba.max(), 3)
+    )
+
+
+def score_payload(data: dict, include_proba: bool = False):
+    """
+    Score a decoded request body and return the response payload.
+    
+    include_proba adds each text's unrounded class probabilities as "proba".
+    """
+    texts = data.get('texts')
+    
+    if texts is not None:
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t for t in texts):
+            return {
+                "error": "No texts provided",
+                "gate_decision": "REJECT",
+                "guidance": "Please provide a question."
+            }
+        
+        probas = model.predict_proba(texts)
+        results = [build_result(t, p) for t, p in zip(texts, probas)]
+        if include_proba:
+            results = [with_proba(r, p) for r, p in zip(results, probas)]
+        return {"results": results}
+    
+    text = data.get('text', '')
+    
+    if not text:
+        return {
+            "error": "No text provided",
+            "gate_decision": "REJECT",
+            "guidance": "Please provide a question."
+        }
+    
+    # Repeated and precomputed texts skip the model
+    proba = cached_predict(text)
+    result = build_result(text, proba)
+    
+    return with_proba(result, proba) if include_proba else result
+
+
+@rawhttp
+def run(request):
     """
     Score a question for depth.
     
@@ -68,49 +223,20 @@ def run(raw_data):
         "guidance": null,
         "confidence": 0.85
     }
+    
+    Batch input {"texts": [...]} is scored in a single predict_proba call
+    and returns {"results": [...]} in the same order.
+    
+    Requests sent with Content-Type or Accept application/msgpack get a
+    msgpack-encoded response of the same shape, plus each result's
+    unrounded class probabilities as "proba"; JSON stays the default.
     """
     try:
-        data = json.loads(raw_data)
-        text = data.get('text', '')
-        
-        if not text:
-            return json.dumps({
-                "error": "No text provided",
-                "gate_decision": "REJECT",
-                "guidance": "Please provide a question."
-            })
-        
-        # Get prediction probabilities
-        proba = model.predict_proba([text])[0]
-        depth_score = float(proba[1])  # Probability of "deep" class
-        
-        # Determine gate decision (threshold 0.6 for questions)
-        gate_decision = "PROCEED" if depth_score >= 0.6 else "REJECT"
-        
-        # Get rejection info if rejected
-        rejection_type = None
-        guidance = None
-        if gate_decision == "REJECT":
-            rejection_type = detect_rejection_type(text)
-            guidance = REJECTION_GUIDANCE.get(rejection_type, REJECTION_GUIDANCE["generic"])
-        
-        result = {
-            "depth_score": round(depth_score, 3),
-            "dimensions": {
-                "specificity": round(depth_score * 0.95 + np.random.uniform(-0.05, 0.05), 3),
-                "introspective_depth": round(depth_score * 0.98 + np.random.uniform(-0.05, 0.05), 3),
-                "non_leading": round(depth_score * 0.92 + np.random.uniform(-0.05, 0.05), 3)
-            },
-            "gate_decision": gate_decision,
-            "rejection_type": rejection_type,
-            "guidance": guidance,
-            "confidence": round(float(max(proba)), 3)
-        }
-        
-        return json.dumps(result)
+        data = read_body(request)
+        return respond(request, score_payload(data, include_proba=wants_msgpack(request)))
         
     except Exception as e:
-        return json.dumps({
+        return respond(request, {
             "error": str(e),
             "gate_decision": "REJECT"
         })
@@ -14,32 +14,40 @@ Output: Consequence Depth Score (0.0-1.0)
 Gate Threshold: 0.5
 """
 
-import json
 import os
 import argparse
-import joblib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+import pyarrow.json as paj
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.pipeline import Pipeline
+from sklearn.utils.class_weight import compute_class_weight
+
+from _model_store import save_model_arrays
+from _word_tokenizer import tokenize
+
+# Streaming training: rows per partial_fit call and passes over the data
+CHUNK_SIZE = 4096
+N_EPOCHS = 10
+
+# Coefficients below this fraction of the largest |coef| are zeroed before saving
+PRUNE_THRESHOLD = 0.1
+CLASSES = np.array([0, 1])
 
 
 def load_training_data(data_path: str):
     """Load labeled reflection data from JSONL file."""
-    texts = []
-    scores = []
-    dimensions = []
-    
-    with open(data_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            item = json.loads(line.strip())
-            texts.append(item['text'])
-            scores.append(item['score'])
-            dimensions.append(item.get('dimensions', {}))
-    
-    return texts, np.array(scores), dimensions
+    table = paj.read_json(data_path)
+    texts = table.column('text').to_pylist()
+    scores = table.column('score').to_numpy()
+    dimensions = (
+        [d or {} for d in table.column('dimensions').to_pylist()]
+        if 'dimensions' in table.column_names else [{}] * table.num_rows
+    )
+
+    return texts, scores, dimensions
 
 
 def create_binary_labels(scores: np.ndarray, threshold: float = 0.5):
@@ -47,29 +55,66 @@ def create_binary_labels(scores: np.ndarray, threshold: float = 0.5):
     return (scores >= threshold).astype(int)
 
 
+def iter_chunks(texts, labels, chunk_size: int = CHUNK_SIZE):
+    """Yield aligned (texts, labels) slices of at most chunk_size rows."""
+    for start in range(0, len(texts), chunk_size):
+        yield texts[start:start + chunk_size], labels[start:start + chunk_size]
+
+
 def train_classifier(texts, labels):
-    """Train a text classification pipeline."""
-    pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(
-            max_features=8000,
-            ngram_range=(1, 4),
-            stop_words='english',
-            min_df=1
-        )),
-        ('classifier', LogisticRegression(
-            max_iter=1000,
-            class_weight='balanced',
-            random_state=42
-        ))
-    ])
+    """Train a hashed-feature text classification pipeline in chunks."""
+    vectorizer = HashingVectorizer(
+        tokenizer=tokenize,
+        token_pattern=None,
+        n_features=2 ** 18,
+        ngram_range=(1, 4),
+        stop_words='english',
+        alternate_sign=False,
+        norm=None
+    )
+    tfidf = TfidfTransformer()
+    classifier = SGDClassifier(
+        loss='log_loss',
+        penalty='l1',
+        random_state=42
+    )
     
-    pipeline.fit(texts, labels)
-    return pipeline
+    # Hashing is stateless, so each chunk is vectorized without a vocabulary
+    # pass; only per-feature document frequencies outlive a chunk
+    labels = np.asarray(labels)
+    doc_freq = np.zeros(vectorizer.n_features, dtype=np.int64)
+    for chunk_texts, _ in iter_chunks(texts, labels):
+        doc_freq += np.asarray((vectorizer.transform(chunk_texts) > 0).sum(axis=0)).ravel()
+    
+    # Same smoothed idf that TfidfTransformer.fit computes
+    tfidf.idf_ = np.log((1 + len(texts)) / (1 + doc_freq)) + 1.0
+    tfidf.n_features_in_ = vectorizer.n_features
+    
+    # partial_fit has no class_weight='balanced', so apply it per sample.
+    # Chunks are re-hashed each epoch rather than held in memory.
+    class_weights = compute_class_weight('balanced', classes=CLASSES, y=labels)
+    for _ in range(N_EPOCHS):
+        for chunk_texts, y in iter_chunks(texts, labels):
+            X = tfidf.transform(vectorizer.transform(chunk_texts))
+            classifier.partial_fit(X, y, classes=CLASSES, sample_weight=class_weights[y])
+    
+    # Drop weak features so only informative ones are stored and scored
+    live = np.count_nonzero(classifier.coef_)
+    classifier.coef_[np.abs(classifier.coef_) < PRUNE_THRESHOLD * np.abs(classifier.coef_).max()] = 0.0
+    print(f"Pruned {live - np.count_nonzero(classifier.coef_)} of {live} nonzero coefficients")
+    
+    return Pipeline([
+        ('hv', vectorizer),
+        ('tfidf', tfidf),
+        ('classifier', classifier)
+    ])
 
 
 def evaluate_model(pipeline, X_test, y_test):
     """Evaluate model performance."""
-    predictions = pipeline.predict(X_test)
+    # One predict_proba pass yields both labels and probabilities
+    probas = pipeline.predict_proba(X_test)
+    predictions = pipeline.classes_[probas.argmax(axis=1)]
     
     print("\n=== Consequence Depth Classifier Evaluation ===")
     print(f"Accuracy: {accuracy_score(y_test, predictions):.3f}")
@@ -80,9 +125,8 @@ def evaluate_model(pipeline, X_test, y_test):
     return predictions
 
 
-def get_depth_score(pipeline, text: str) -> dict:
-    """Get consequence depth score for a single reflection."""
-    proba = pipeline.predict_proba([text])[0]
+def get_depth_score(text: str, proba) -> dict:
+    """Get consequence depth score for a single reflection from its class probabilities."""
     score = proba[1]  # Probability of class 1 (deep)
     
     return {
@@ -116,10 +160,12 @@ def main():
     labels = create_binary_labels(scores, threshold=0.5)
     print(f"Class distribution: Shallow={sum(labels==0)}, Deep={sum(labels==1)}")
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        texts, labels, test_size=args.test_size, random_state=42, stratify=labels
-    )
+    # Split data by index; slicing an object array copies references, not texts
+    texts = np.array(texts, dtype=object)
+    splitter = StratifiedShuffleSplit(n_splits=1, test_size=args.test_size, random_state=42)
+    train_idx, test_idx = next(splitter.split(np.zeros(len(labels)), labels))
+    X_train, X_test = texts[train_idx], texts[test_idx]
+    y_train, y_test = labels[train_idx], labels[test_idx]
     
     print(f"\nTraining set: {len(X_train)} examples")
     print(f"Test set: {len(X_test)} examples")
@@ -131,9 +177,9 @@ def main():
     # Evaluate
     evaluate_model(pipeline, X_test, y_test)
     
-    # Save model
-    model_path = os.path.join(args.output_dir, 'consequence_depth_model.joblib')
-    joblib.dump(pipeline, model_path)
+    # Save model as plain arrays (no pickle) for endpoint cold start
+    model_path = os.path.join(args.output_dir, 'consequence_depth_model')
+    save_model_arrays(pipeline, model_path)
     print(f"\nModel saved to: {model_path}")
     
     # Test with sample reflections
@@ -145,8 +191,9 @@ def main():
         "Perhaps I've discovered that grief doesn't arrive all at once—it seeps in through the cracks of ordinary moments."
     ]
     
-    for reflection in test_reflections:
-        result = get_depth_score(pipeline, reflection)
+    probas = pipeline.predict_proba(test_reflections)
+    for reflection, proba in zip(test_reflections, probas):
+        result = get_depth_score(reflection, proba)
         print(f"\nReflection: {result['text']}")
         print(f"  Score: {result['consequence_depth_score']:.3f}")
         print(f"  Gate: {result['gate_decision']}")
@@ -11,7 +11,7 @@ import { RefusalResponse } from '../types/refusal';
 const GRAVITY_THRESHOLD = 0.4;
 
 // Path to trained model (loaded locally for MVP)
-const MODEL_PATH = './ml/outputs/decision_gravity_model.joblib';
+const MODEL_PATH = './ml/outputs/decision_gravity_model';
 
 // Cached model instance
 let model: any = null;